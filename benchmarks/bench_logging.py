@@ -0,0 +1,93 @@
+"""
+Measure the per-call cost of request-path logging.
+
+Run from the repository root:
+    python benchmarks/bench_logging.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger  # noqa: E402
+
+from logging_utils import BackgroundSink, configure_logging, log_payload  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+ITERATIONS = 20000
+PAYLOAD = "print('Hello, World!')\n" * 2000  # ~46 KB of submitted code
+
+
+class _SlowStream:
+    """Stand-in for a contended stdout pipe or log collector that takes ~200us per write."""
+
+    def write(self, message):
+        time.sleep(0.0002)
+
+    def flush(self):
+        pass
+
+
+def _time_per_call(func, iterations=ITERATIONS):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _use_sink(path, enqueue, level="DEBUG", sample_rate=1.0):
+    configure_logging(level=level, enqueue=enqueue, default_sample_rate=sample_rate)
+    logger.remove()
+    stream = _SlowStream() if path is None else open(path, "a")
+    logger.add(BackgroundSink(stream) if enqueue else stream, level=level,
+               format="{time} - {name} - {level} - {message}")
+
+
+def main():
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.log")
+
+        _use_sink(path, enqueue=False)
+        results.append(("eager f-string, full payload, sync sink",
+                        _time_per_call(lambda: logger.info(f"Code received: {PAYLOAD}"), 2000)))
+
+        _use_sink(path, enqueue=False)
+        results.append(("log_payload, truncated, sync sink",
+                        _time_per_call(lambda: log_payload("process_code", "Code received", PAYLOAD))))
+
+        _use_sink(path, enqueue=True)
+        results.append(("log_payload, truncated, enqueued sink",
+                        _time_per_call(lambda: log_payload("process_code", "Code received", PAYLOAD))))
+
+        _use_sink(None, enqueue=False)
+        results.append(("log_payload, truncated, slow sync sink",
+                        _time_per_call(lambda: log_payload("process_code", "Code received", PAYLOAD), 2000)))
+
+        _use_sink(None, enqueue=True)
+        results.append(("log_payload, truncated, slow enqueued sink",
+                        _time_per_call(lambda: log_payload("process_code", "Code received", PAYLOAD), 2000)))
+
+        _use_sink(path, enqueue=True, sample_rate=0.01)
+        results.append(("log_payload, 1% sampling, enqueued sink",
+                        _time_per_call(lambda: log_payload("process_code", "Code received", PAYLOAD))))
+
+        _use_sink(path, enqueue=True, level="INFO")
+        results.append(("log_payload, level disabled",
+                        _time_per_call(lambda: log_payload("process_code", "Code received", PAYLOAD))))
+
+        rate_limiter = RateLimiter(max_requests_per_minute=10 ** 9, max_tokens_per_minute=10 ** 9,
+                                   max_requests_per_day=10 ** 9)
+        results.append(("RateLimiter.can_proceed, INFO level",
+                        _time_per_call(lambda: rate_limiter.can_proceed(tokens=1))))
+        logger.remove()
+
+    width = max(len(name) for name, _ in results)
+    for name, micros in results:
+        print(f"{name:<{width}}  {micros:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Measure cold-start cost: time to import the application module and time to serve the first request.
+
+Each measurement runs in a fresh interpreter. Run from the repository root:
+    python benchmarks/bench_startup.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.create_app(warmup=False)) as client:
+    client.get("/openapi.json")
+first_request = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (first_request - start) * 1000,
+    "genai_imported": "google.generativeai" in sys.modules,
+}))
+"""
+
+
+def _probe():
+    env = dict({"GOOGLE_API_KEY": "bench", "SESSION_SECRET_KEY": "bench", **os.environ}, LOG_LEVEL="ERROR")
+    output = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    results = [_probe() for _ in range(RUNS)]
+    print(f"import main:            {statistics.median(r['import_ms'] for r in results):8.1f} ms (median of {RUNS})")
+    print(f"time to first request:  {statistics.median(r['first_request_ms'] for r in results):8.1f} ms "
+          f"(median of {RUNS})")
+    print(f"google.generativeai imported before first model call: {any(r['genai_imported'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Measure per-request connection overhead of Gemini API calls against a local stub server.
+
+Compares the SDK's default REST client with the shared, pooled transport from transport.py, for concurrent
+generate_content calls and for File API uploads. The stub serves HTTPS with a throwaway self-signed certificate, so
+every new connection pays for a TLS handshake as it would against the real API. Requires the openssl command.
+Run from the repository root:
+    python benchmarks/bench_transport.py
+"""
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+import google.generativeai as genai  # noqa: E402
+
+from transport import GenaiTransport  # noqa: E402
+
+CONCURRENCY = 24
+REQUESTS = 1200
+UPLOADS = 100
+UPLOAD_SIZE = 1024 * 1024
+LATENCY = 0.002
+
+_GENERATE_RESPONSE = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP", "index": 0}]
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body=b"{}", headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(LATENCY)
+        command = self.headers.get("X-Goog-Upload-Command", "")
+        if self.path.startswith("/upload/") and command == "start":
+            host = self.headers["Host"]
+            self._reply(headers={"X-Goog-Upload-URL": f"https://{host}/upload/v1beta/files?upload_id=1"})
+        elif "finalize" in command:
+            self._reply(json.dumps({"file": {"name": "files/stub"}}).encode())
+        elif command == "upload":
+            self._reply()
+        else:
+            self._reply(_GENERATE_RESPONSE)
+
+
+def _start_server(tmp_dir):
+    cert, key = os.path.join(tmp_dir, "cert.pem"), os.path.join(tmp_dir, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-keyout", key,
+                    "-out", cert, "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+                   check=True, capture_output=True)
+    os.environ["REQUESTS_CA_BUNDLE"] = cert
+
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"https://127.0.0.1:{server.server_address[1]}"
+
+
+def _generate(model):
+    start = time.perf_counter()
+    model.generate_content("hello")
+    return time.perf_counter() - start
+
+
+def _run_generate(label):
+    StubHandler.connections = 0
+    model = genai.GenerativeModel("gemini-1.5-flash")
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(lambda _: _generate(model), range(REQUESTS)))
+        elapsed = time.perf_counter() - start
+    print(f"{label:<44} {REQUESTS / elapsed:8.1f} req/s  {sum(latencies) / len(latencies) * 1000:6.2f} ms/req  "
+          f"{StubHandler.connections:5d} connections")
+
+
+def _run_uploads(label, upload):
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    for _ in range(UPLOADS):
+        upload()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {UPLOADS / elapsed:8.1f} up/s   {elapsed / UPLOADS * 1000:6.2f} ms/up   "
+          f"{StubHandler.connections:5d} connections")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server, endpoint = _start_server(tmp_dir)
+
+        genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": endpoint})
+        _run_generate("generate_content, SDK default REST client")
+
+        genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": endpoint})
+        transport = GenaiTransport("stub", kind="rest", endpoint=endpoint, pool_size=CONCURRENCY,
+                                   upload_chunk_size=256 * 1024)
+        transport.install()
+        _run_generate("generate_content, shared pooled REST transport")
+
+        path = os.path.join(tmp_dir, "upload.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(UPLOAD_SIZE))
+
+        def upload_with_fresh_session():
+            # A new HTTP client per upload, as the SDK's upload_file does
+            uploader = GenaiTransport("stub", kind="rest", endpoint=endpoint, upload_chunk_size=256 * 1024)
+            uploader.upload_file(path, display_name="bench")
+            uploader.close()
+
+        _run_uploads("1 MiB upload in 256 KiB chunks, new session", upload_with_fresh_session)
+        _run_uploads("1 MiB upload in 256 KiB chunks, pooled session",
+                      lambda: transport.upload_file(path, display_name="bench"))
+
+        print(json.dumps(transport.stats(), indent=2))
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
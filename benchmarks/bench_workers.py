@@ -0,0 +1,100 @@
+"""
+Measure request throughput against the number of uvicorn workers, with rate limiting enabled and its counters kept
+in the shared SQLite state backend.
+
+The benchmark route blocks for a fixed time inside an async handler, as the Gemini routes do while waiting on the
+synchronous SDK, so throughput is bounded by the number of workers rather than CPU. Run from the repository root:
+    python benchmarks/bench_workers.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_COUNTS = (1, 2, 4)
+CLIENTS = 16
+DURATION = 5
+UPSTREAM_LATENCY = 0.02
+
+
+def bench_app():
+    from main import DEFAULT_MIDDLEWARE_CONFIG, create_app
+
+    app = create_app({**DEFAULT_MIDDLEWARE_CONFIG, "rate_limit": True,
+                      "rate_limits": {"max_requests_per_minute": 10 ** 9, "max_tokens_per_minute": 10 ** 9,
+                                      "max_requests_per_day": 10 ** 9}})
+
+    @app.get("/bench")
+    async def bench():
+        time.sleep(UPSTREAM_LATENCY)  # Stand-in for a blocking Gemini SDK call
+        return {"pid": os.getpid()}
+
+    return app
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def _run(workers, state_dir):
+    port = _free_port()
+    env = dict({"GOOGLE_API_KEY": "bench", **os.environ}, WEB_CONCURRENCY=str(workers), SESSION_SECRET_KEY="bench", LOG_LEVEL="ERROR",
+               STATE_BACKEND_URL=f"sqlite:///{state_dir}/state-{workers}.db",
+               PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "benchmarks")]))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "bench_workers:bench_app", "--factory",
+                               "--port", str(port), "--workers", str(workers), "--log-level", "error"],
+                              cwd=ROOT, env=env)
+    try:
+        url = f"http://127.0.0.1:{port}/bench"
+        _wait_until_ready(url)
+        counts = [0] * CLIENTS
+        pids = set()
+        deadline = time.time() + DURATION
+
+        def client(index):
+            with httpx.Client(timeout=30) as http:
+                while time.time() < deadline:
+                    response = http.get(url)
+                    response.raise_for_status()
+                    pids.add(response.json()["pid"])
+                    counts[index] += 1
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(counts) / DURATION, len(pids)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as state_dir:
+        for workers in WORKER_COUNTS:
+            throughput, serving = _run(workers, state_dir)
+            print(f"{workers} worker(s): {throughput:8.1f} requests/s ({serving} processes served requests)")
+
+
+if __name__ == "__main__":
+    main()
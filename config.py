@@ -1,35 +1,65 @@
 import os
-import sys
 
 from dotenv import load_dotenv, find_dotenv
 from loguru import logger
 
-# Load environment variables from .env file
+from logging_utils import configure_logging, parse_sample_rates
+
+# Load environment variables from .env file, if present. Variables already set in the environment take precedence.
 dotenv_path = find_dotenv()
-if not dotenv_path:
-    logger.error("Could not find .env file")
-    raise FileNotFoundError("Could not find .env file")
-load_dotenv(dotenv_path)
-logger.info(".env file loaded successfully")
+if dotenv_path:
+    load_dotenv(dotenv_path)
+    logger.info(".env file loaded successfully")
+else:
+    logger.info("No .env file found, using environment variables")
 
-# API Key Configuration
+# API Key Configuration. Checked at application startup, see main.create_app.
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
-    logger.error("GOOGLE_API_KEY environment variable is not set")
-    raise ValueError("GOOGLE_API_KEY environment variable is not set")
-logger.info("GOOGLE_API_KEY loaded successfully")
+    logger.warning("GOOGLE_API_KEY environment variable is not set")
+
+# Startup Configuration
+WARMUP = os.getenv("WARMUP", "false").lower() in ("1", "true", "yes")
+WARMUP_MODELS = [name.strip() for name in os.getenv("WARMUP_MODELS", "gemini-1.5-pro-latest,gemini-1.5-flash").split(",")
+                 if name.strip()]
+
+# Gemini API Transport Configuration
+GENAI_TRANSPORT = os.getenv("GENAI_TRANSPORT", "grpc").lower()
+GENAI_API_ENDPOINT = os.getenv("GENAI_API_ENDPOINT", "generativelanguage.googleapis.com")
+GENAI_POOL_SIZE = int(os.getenv("GENAI_POOL_SIZE", "32"))
+GENAI_KEEPALIVE_SECONDS = int(os.getenv("GENAI_KEEPALIVE_SECONDS", "30"))
+GENAI_UPLOAD_CHUNK_SIZE = int(os.getenv("GENAI_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+GENAI_UPLOAD_MAX_RETRIES = int(os.getenv("GENAI_UPLOAD_MAX_RETRIES", "3"))
+
+# Deployment Configuration. The worker count a server was started with, e.g. by `uvicorn --workers` or `gunicorn -w`,
+# is not visible to the application, so the defaults are safe for any number of workers. WEB_CONCURRENCY is only used
+# by `python main.py`; uvicorn and gunicorn also read it as their default worker count.
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+STATE_BACKEND_URL = os.getenv("STATE_BACKEND_URL", "sqlite:///.state/state.db")
+SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY")
+# Allows running without SESSION_SECRET_KEY, using a random per-process secret. Only suitable for a single worker.
+DEV_MODE = os.getenv("DEV_MODE", "false").lower() in ("1", "true", "yes")
+if WORKERS > 1 and STATE_BACKEND_URL.startswith("memory://"):
+    logger.warning("The memory state backend is not shared between workers; rate limits apply per worker")
 
 # Logging Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_FORMAT = "{time} - {name} - {level} - {message}"
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes")
+LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "true").lower() in ("1", "true", "yes")
+LOG_MAX_PAYLOAD_CHARS = int(os.getenv("LOG_MAX_PAYLOAD_CHARS", "512"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
 
 try:
-    logger.remove()  # Remove the default logger
-    logger.add(
-        sys.stdout,
+    configure_logging(
         level=LOG_LEVEL,
-        format=LOG_FORMAT,
-        colorize=True
+        log_format=LOG_FORMAT,
+        serialize=LOG_JSON,
+        enqueue=LOG_ENQUEUE,
+        max_payload_chars=LOG_MAX_PAYLOAD_CHARS,
+        default_sample_rate=LOG_SAMPLE_RATE,
+        sample_rates=LOG_SAMPLE_RATES,
     )
     logger.info(f"Logging configured successfully with level: {LOG_LEVEL}")
 except Exception as e:
@@ -1,12 +1,12 @@
 from typing import List
 
-import google.generativeai as genai
-from PIL import Image
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 
 from config import logger
+from genai_client import get_genai, get_model, get_transport_stats, upload_file
+from logging_utils import log_payload
 from utils import GenerateStructuredOutputRequest, save_temp_file, clean_up_temp_file, Message
 
 
@@ -25,8 +25,8 @@ async def process_image(file: UploadFile = File(...)):
         temp_file_path = save_temp_file(image_data, file.filename)
 
         # Upload the image file
-        uploaded_image = genai.upload_file(path=temp_file_path, display_name=file.filename)
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        uploaded_image = upload_file(temp_file_path, display_name=file.filename)
+        model = get_model("gemini-1.5-pro-latest")
         prompt = "Describe this image."
         response = model.generate_content([uploaded_image, prompt])
 
@@ -50,11 +50,11 @@ async def process_video(file: UploadFile = File(...)):
         temp_file_path = save_temp_file(video_data, file.filename)
 
         # Upload the video file
-        uploaded_video = genai.upload_file(path=temp_file_path, display_name=file.filename)
+        uploaded_video = upload_file(temp_file_path, display_name=file.filename)
         while uploaded_video.state.name == "PROCESSING":
-            uploaded_video = genai.get_file(uploaded_video.name)
+            uploaded_video = get_genai().get_file(uploaded_video.name)
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        model = get_model("gemini-1.5-pro-latest")
         prompt = "Summarize this video."
         response = model.generate_content([uploaded_video, prompt])
 
@@ -84,8 +84,8 @@ async def process_pdf(file: UploadFile = File(...)):
         temp_file_path = save_temp_file(pdf_data, file.filename)
 
         # Upload the PDF file
-        uploaded_pdf = genai.upload_file(path=temp_file_path, display_name=file.filename)
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        uploaded_pdf = upload_file(temp_file_path, display_name=file.filename)
+        model = get_model("gemini-1.5-pro-latest")
         prompt = "Summarize this PDF document."
         response = model.generate_content([uploaded_pdf, prompt])
 
@@ -105,7 +105,7 @@ async def process_audio(file: UploadFile = File(...)):
         audio_data = await file.read()
         logger.info(f"File received: {file.filename}")
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        model = get_model("gemini-1.5-pro-latest")
         prompt = "Summarize this audio."
         response = model.generate_content([
             prompt,
@@ -133,8 +133,8 @@ async def process_audio_file(file: UploadFile = File(...)):
         temp_file_path = save_temp_file(audio_data, file.filename)
 
         # Upload the audio file
-        uploaded_audio = genai.upload_file(path=temp_file_path, display_name=file.filename)
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        uploaded_audio = upload_file(temp_file_path, display_name=file.filename)
+        model = get_model("gemini-1.5-pro-latest")
         prompt = "Summarize this audio."
         response = model.generate_content([uploaded_audio, prompt])
 
@@ -151,9 +151,9 @@ async def process_audio_file(file: UploadFile = File(...)):
                     description="Execute Python code and return the result using Google's Generative AI.")
 async def process_code(code: str = "print('Hello, World!')"):
     try:
-        logger.info(f"Code received: {code}")
+        log_payload("process_code", "Code received", code)
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest", tools='code_execution')
+        model = get_model("gemini-1.5-pro-latest", tools="code_execution")
         prompt = f"Execute this Python code: ```python\n{code}\n```"
         response = model.generate_content(prompt)
 
@@ -167,13 +167,13 @@ async def process_code(code: str = "print('Hello, World!')"):
                     description="Search the web for information using Google's Generative AI.")
 async def process_search(query: str = "What is the capital of France?"):
     try:
-        logger.info(f"Search query received: {query}")
+        log_payload("process_search", "Search query received", query)
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        model = get_model("gemini-1.5-pro-latest")
         prompt = f"Search the web and provide information about: {query}"
         response = model.generate_content(prompt)
 
-        logger.info(f"Search response: {response.text}")
+        log_payload("process_search", "Search response", lambda: response.text)
 
         return JSONResponse(content=jsonable_encoder({'response': response.text}), status_code=200)
     except Exception as e:
@@ -185,11 +185,13 @@ async def process_search(query: str = "What is the capital of France?"):
                     description="Generate text from a text-and-image input using Google's Generative AI.")
 async def generate_text_image(prompt: str, file: UploadFile = File(...)):
     try:
-        logger.info(f"Prompt received: {prompt}")
+        log_payload("generate_text_image", "Prompt received", prompt)
         logger.info(f"File received: {file.filename}")
 
+        from PIL import Image
+
         image = Image.open(file.file)
-        model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+        model = get_model("gemini-1.5-flash")
         response = model.generate_content([prompt, image])
 
         return JSONResponse(content=jsonable_encoder({'response': response.text}), status_code=200)
@@ -202,9 +204,9 @@ async def generate_text_image(prompt: str, file: UploadFile = File(...)):
                     description="Generate a text stream from a text-only input using Google's Generative AI.")
 async def generate_text_stream(prompt: str):
     try:
-        logger.info(f"Prompt received: {prompt}")
+        log_payload("generate_text_stream", "Prompt received", prompt)
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+        model = get_model("gemini-1.5-flash")
         response = model.generate_content(prompt, stream=True)
         stream_response = [chunk.text for chunk in response]
 
@@ -219,28 +221,28 @@ async def generate_text_stream(prompt: str):
 async def interactive_chat(messages: List[Message]):
     try:
         # Log the received messages
-        logger.debug(f"Received messages: {messages}")
+        log_payload("interactive_chat", "Received messages", messages)
 
         # Validate roles
         for message in messages:
-            logger.debug(f"Validating message role: {message.role}")
+            logger.debug("Validating message role: {}", message.role)
             if message.role not in ["user", "model"]:
                 logger.error(f"Invalid role found: {message.role}")
                 raise HTTPException(status_code=400, detail="Please use a valid role: user, model.")
 
         # Log the validated messages
-        logger.debug(f"Validated messages: {messages}")
+        log_payload("interactive_chat", "Validated messages", messages)
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+        model = get_model("gemini-1.5-flash")
         chat = model.start_chat(history=[message.dict() for message in messages])
 
         # Log the chat history
-        logger.debug(f"Chat history: {[message.dict() for message in messages]}")
+        log_payload("interactive_chat", "Chat history", lambda: [message.dict() for message in messages])
 
         response = chat.send_message(messages[-1].parts)
 
         # Log the response
-        logger.debug(f"Response: {response.text}")
+        log_payload("interactive_chat", "Response", lambda: response.text)
 
         return JSONResponse(content=jsonable_encoder({'response': response.text}), status_code=200)
     except Exception as e:
@@ -252,9 +254,10 @@ async def interactive_chat(messages: List[Message]):
                     description="Generate structured JSON output using Google's Generative AI.")
 async def generate_structured_output(request: GenerateStructuredOutputRequest):
     try:
-        logger.info(f"Request received: {request.json()}")
+        log_payload("generate_structured_output", "Request received", request.json)
 
-        model = genai.GenerativeModel(model_name="gemini-1.5-pro-latest")
+        genai = get_genai()
+        model = get_model("gemini-1.5-pro-latest")
         response = model.generate_content(
             request.prompt,
             generation_config=genai.GenerationConfig(
@@ -263,10 +266,16 @@ async def generate_structured_output(request: GenerateStructuredOutputRequest):
             ),
         )
 
-        logger.info(f"Response generated: {response}")
+        log_payload("generate_structured_output", "Response generated", response)
 
         return JSONResponse(content=jsonable_encoder({'response': response.candidates[0].content.parts[0].text}),
                             status_code=200)
     except Exception as e:
         logger.error(f"Error generating structured output: {e}")
         raise HTTPException(status_code=500, detail="Error generating structured output")
+
+
+@gemini_router.get("/transport_stats", tags=["Diagnostics"], summary="Transport Stats",
+                   description="Connection pool statistics of the transport used to call Google's Generative AI.")
+async def transport_stats():
+    return JSONResponse(content=jsonable_encoder({'response': get_transport_stats()}), status_code=200)
@@ -0,0 +1,130 @@
+import threading
+from functools import lru_cache
+
+from config import (GENAI_API_ENDPOINT, GENAI_KEEPALIVE_SECONDS, GENAI_POOL_SIZE, GENAI_TRANSPORT,
+                    GENAI_UPLOAD_CHUNK_SIZE, GENAI_UPLOAD_MAX_RETRIES, GOOGLE_API_KEY, logger)
+
+_genai = None
+_transport = None
+_genai_lock = threading.Lock()
+
+
+def check_api_key() -> None:
+    """
+    Raise if the Google API key is not configured. Cheap enough to call at startup, as it does not import the SDK.
+    """
+    if not GOOGLE_API_KEY:
+        logger.error("GOOGLE_API_KEY environment variable is not set")
+        raise ValueError("GOOGLE_API_KEY environment variable is not set")
+
+
+def get_genai():
+    """
+    Import and configure the Google Generative AI SDK on first use.
+
+    The SDK is slow to import, so it is loaded lazily instead of when the application module is imported. Its default
+    clients are replaced by ones sharing a single pooled connection, see transport.GenaiTransport.
+
+    Returns:
+        module: The configured google.generativeai module.
+    """
+    global _genai, _transport
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                check_api_key()
+
+                import google.generativeai as genai
+                from transport import GenaiTransport
+
+                try:
+                    genai.configure(api_key=GOOGLE_API_KEY, transport=GENAI_TRANSPORT,
+                                    client_options={"api_endpoint": GENAI_API_ENDPOINT})
+                    transport = GenaiTransport(
+                        GOOGLE_API_KEY,
+                        kind=GENAI_TRANSPORT,
+                        endpoint=GENAI_API_ENDPOINT,
+                        pool_size=GENAI_POOL_SIZE,
+                        keepalive_seconds=GENAI_KEEPALIVE_SECONDS,
+                        upload_chunk_size=GENAI_UPLOAD_CHUNK_SIZE,
+                        upload_max_retries=GENAI_UPLOAD_MAX_RETRIES,
+                    )
+                    transport.install()
+                    logger.info("Google Generative AI API configured successfully")
+                except Exception as e:
+                    logger.error(f"Error configuring Google Generative AI API: {e}")
+                    raise
+                _transport = transport
+                _genai = genai
+    return _genai
+
+
+def upload_file(path: str, display_name: str = None, mime_type: str = None):
+    """
+    Upload a file to the File API through the shared connection pool, in resumable chunks.
+
+    Args:
+        path (str): Path of the file to upload.
+        display_name (str): Optional display name of the file.
+        mime_type (str): MIME type of the file. Guessed from the file name if not provided.
+
+    Returns:
+        File: The uploaded file.
+    """
+    genai = get_genai()
+    return genai.types.File(_transport.upload_file(path, mime_type=mime_type, display_name=display_name))
+
+
+def get_transport_stats() -> dict:
+    """
+    Return connection pool statistics of the Gemini API transport, or an empty dict if it is not initialized yet.
+    """
+    return _transport.stats() if _transport is not None else {}
+
+
+def close_transport() -> None:
+    """
+    Close the pooled connections of the Gemini API transport, if it was initialized.
+
+    The SDK and model instances built on the closed pool are discarded too, so the next get_genai() call builds a new
+    pool, e.g. when an application is started again in the same process.
+    """
+    global _genai, _transport
+    with _genai_lock:
+        if _transport is not None:
+            _transport.close()
+        _genai = None
+        _transport = None
+        get_model.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_model(model_name: str, tools: str = None):
+    """
+    Return a shared GenerativeModel instance for the given model name and tools.
+
+    Args:
+        model_name (str): Name of the Gemini model.
+        tools (str): Optional tools to enable on the model, e.g. "code_execution".
+    """
+    return get_genai().GenerativeModel(model_name=model_name, tools=tools)
+
+
+def warm_up(model_names) -> None:
+    """
+    Configure the SDK, build the shared model instances and open a connection to the API ahead of the first request.
+
+    Failures are logged and do not prevent the application from starting.
+
+    Args:
+        model_names (list): Names of the models to prepare.
+    """
+    try:
+        genai = get_genai()
+        for model_name in model_names:
+            get_model(model_name)
+        if model_names:
+            genai.get_model(f"models/{model_names[0]}")
+        logger.info(f"Warm-up completed for models: {', '.join(model_names)}")
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
@@ -0,0 +1,207 @@
+import functools
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, TextIO
+
+from loguru import logger
+
+# Runtime settings, populated by configure_logging()
+_max_payload_chars = 512
+_default_sample_rate = 1.0
+_sample_rates: Dict[str, float] = {}
+
+# Records at or above this level wait for room in the BackgroundSink queue instead of being dropped
+_BLOCKING_LEVEL_NO = logger.level("WARNING").no
+
+
+class BackgroundSink:
+    """
+    Loguru sink that hands formatted records to a writer thread so callers never block on I/O.
+
+    Records below WARNING are dropped, and counted, if the writer falls more than max_queue_size records behind; the
+    writer reports the number of dropped records at most once every report_interval seconds. WARNING and above wait
+    for room in the queue instead. The writer thread is restarted in child processes after a fork.
+    """
+
+    def __init__(self, stream: TextIO, max_queue_size: int = 10000, report_interval: float = 10.0):
+        self.stream = stream
+        self.max_queue_size = max_queue_size
+        self.report_interval = report_interval
+        self._stopped = False
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=functools.partial(_restart_sink, weakref.ref(self)))
+
+    def _start(self) -> None:
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._last_report = time.monotonic()
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped since the last report."""
+        return self._dropped
+
+    def write(self, message: str) -> None:
+        if threading.current_thread() is self._thread:
+            # Only the drop report is logged from the writer thread, and it must not wait on its own queue
+            self.stream.write(message)
+            return
+        record = getattr(message, "record", None)
+        if record is not None and record["level"].no >= _BLOCKING_LEVEL_NO:
+            self._queue.put(message)
+            return
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def _report_dropped(self) -> None:
+        now = time.monotonic()
+        if not self._dropped or now - self._last_report < self.report_interval:
+            return
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        self._last_report = now
+        # Logged from a separate thread: a caller blocked on a full queue holds loguru's handler lock, which the
+        # writer would otherwise wait for while the caller waits for the writer
+        threading.Thread(
+            target=logger.warning, args=("{} log records dropped because the log writer fell behind", dropped),
+            daemon=True,
+        ).start()
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+            try:
+                self.stream.write(message)
+                if self._queue.empty():
+                    self.stream.flush()
+            except ValueError:
+                # The stream was closed underneath us, e.g. during interpreter shutdown
+                with self._dropped_lock:
+                    self._dropped += 1
+            self._report_dropped()
+        try:
+            self.stream.flush()
+        except ValueError:
+            pass
+
+    def stop(self) -> None:
+        # Called by loguru when the sink is removed, including at interpreter exit
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join()
+
+
+def _restart_sink(sink_ref: "weakref.ref[BackgroundSink]") -> None:
+    # A forked child inherits the queue but not the writer thread, e.g. workers of gunicorn --preload. Records queued
+    # before the fork are written by the parent.
+    sink = sink_ref()
+    if sink is not None and not sink._stopped:
+        sink._start()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """
+    Parse a per-route sample rate specification such as "process_search=0.1,process_code=0.5".
+
+    Args:
+        value (str): Comma separated list of route=rate pairs.
+
+    Returns:
+        Dict[str, float]: Mapping of route name to a sample rate between 0 and 1.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, _, rate = item.partition("=")
+        try:
+            rates[route.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            logger.warning("Ignoring invalid log sample rate: {}", item)
+    return rates
+
+
+def configure_logging(level: str = "INFO", log_format: Optional[str] = None, serialize: bool = False,
+                      enqueue: bool = True, max_payload_chars: int = 512, default_sample_rate: float = 1.0,
+                      sample_rates: Optional[Dict[str, float]] = None) -> None:
+    """
+    Configure the application-wide loguru sink.
+
+    Args:
+        level (str): Minimum log level.
+        log_format (str): Format of plain-text records. Ignored when serialize is enabled.
+        serialize (bool): Emit one JSON document per record instead of plain text.
+        enqueue (bool): Hand records to a background thread so callers never block on I/O.
+        max_payload_chars (int): Maximum number of characters kept from a logged payload.
+        default_sample_rate (float): Fraction of payload logs kept for routes without an explicit rate.
+        sample_rates (dict): Per-route overrides of the sample rate.
+    """
+    global _max_payload_chars, _default_sample_rate, _sample_rates
+
+    _max_payload_chars = max_payload_chars
+    _default_sample_rate = default_sample_rate
+    _sample_rates = dict(sample_rates or {})
+
+    options = {"level": level, "serialize": serialize}
+    if not serialize:
+        options.update(format=log_format or "{time} - {name} - {level} - {message}", colorize=True)
+
+    logger.remove()  # Remove the default logger
+    logger.add(BackgroundSink(sys.stdout) if enqueue else sys.stdout, **options)
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> str:
+    """
+    Render a value as a string capped at the configured payload size.
+    """
+    limit = _max_payload_chars if limit is None else limit
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+
+def should_sample(route: str) -> bool:
+    """
+    Decide whether a payload log for the given route is kept.
+    """
+    rate = _sample_rates.get(route, _default_sample_rate)
+    if rate >= 1.0:
+        return True
+    return rate > 0.0 and random.random() < rate
+
+
+def log_payload(route: str, label: str, payload: Any, level: str = "DEBUG") -> None:
+    """
+    Log a size-capped payload for a route, subject to the route's sample rate.
+
+    Formatting is deferred until loguru knows the record will be emitted, so disabled levels and
+    dropped samples cost no more than a dictionary lookup. A callable payload is only invoked when
+    the record is actually written.
+
+    Args:
+        route (str): Name of the route the payload belongs to.
+        label (str): Short description of the payload.
+        payload (Any): The value to log, or a zero-argument callable returning it.
+        level (str): Log level of the record.
+    """
+    if not should_sample(route):
+        return
+    logger.opt(lazy=True, depth=1).log(
+        level, "{}: {}",
+        lambda: label,
+        lambda: truncate(payload() if callable(payload) else payload),
+        route=lambda: route,
+    )
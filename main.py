@@ -1,31 +1,24 @@
-import google.generativeai as genai
-import uvicorn
-from fastapi import FastAPI, HTTPException
-from starlette.responses import RedirectResponse
-
-from config import GOOGLE_API_KEY, logger
-from gemini_api import gemini_router
-from middlewares import init_middlewares
-
-# Initialize the FastAPI app
-app = FastAPI(
-    title="Generative AI API",
-    description="An API for processing images, videos, PDFs, audio, code, and search queries using Google's "
-                "Generative AI models.",
-    version="0.1.0",
-    docs_url="/",
-)
-
-try:
-    # Configure the Google Generative AI API
-    genai.configure(api_key=GOOGLE_API_KEY)
-    logger.info("Google Generative AI API configured successfully")
-except Exception as e:
-    logger.error(f"Error configuring Google Generative AI API: {e}")
-    raise HTTPException(status_code=500, detail="Error configuring Google Generative AI API")
-
-# Middleware configuration
-middleware_config = {
+import time
+
+# Taken before the remaining imports so the startup log includes import time
+_started_at = time.perf_counter()
+
+import asyncio  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from starlette.responses import RedirectResponse  # noqa: E402
+
+from config import (DEV_MODE, SESSION_SECRET_KEY, STATE_BACKEND_URL, WARMUP, WARMUP_MODELS, WORKERS,  # noqa: E402
+                    logger)
+from gemini_api import gemini_router  # noqa: E402
+from genai_client import check_api_key, close_transport, warm_up  # noqa: E402
+from middlewares import init_middlewares  # noqa: E402
+from state_backend import MemoryBackend, create_backend  # noqa: E402
+
+# Default middleware configuration
+DEFAULT_MIDDLEWARE_CONFIG = {
     "cors": True,
     "gzip": True,
     "session": True,
@@ -35,18 +28,81 @@ middleware_config = {
     "timeout": True,
 }
 
-# Initialize middlewares
-init_middlewares(app, middleware_config)
 
-@app.get("/", include_in_schema=False)
-async def root():
-    return RedirectResponse(url="/docs")
+def create_app(middleware_config: dict = None, warmup: bool = WARMUP, state_backend=None) -> FastAPI:
+    """
+    Create and configure the FastAPI application.
+
+    Heavy dependencies such as the Google Generative AI SDK are imported on first use, so creating the application
+    is cheap. Enable warm-up to load them, and open a connection to the API, during startup instead.
+
+    Args:
+        middleware_config (dict): Configuration dictionary to enable/disable middlewares.
+        warmup (bool): Prepare the SDK and model instances before serving the first request.
+        state_backend: Shared-state backend for rate limits and caches. Defaults to one created from STATE_BACKEND_URL.
+
+    Returns:
+        FastAPI: The configured application instance.
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Fail at boot rather than on every request when the deployment is misconfigured
+        check_api_key()
+        if warmup:
+            await asyncio.to_thread(warm_up, WARMUP_MODELS)
+        logger.info(f"Application startup completed in {(time.perf_counter() - _started_at) * 1000:.1f} ms "
+                    f"since main was first imported")
+        yield
+        close_transport()
+        logger.info("Application shutdown completed")
+
+    # Initialize the FastAPI app
+    app = FastAPI(
+        title="Generative AI API",
+        description="An API for processing images, videos, PDFs, audio, code, and search queries using Google's "
+                    "Generative AI models.",
+        version="0.1.0",
+        docs_url="/",
+        lifespan=lifespan,
+    )
+
+    # State shared by all workers, available to routes as request.app.state.shared_state
+    app.state.shared_state = state_backend if state_backend is not None else create_backend(STATE_BACKEND_URL)
+
+    # Initialize middlewares
+    middleware_config = dict(middleware_config if middleware_config is not None else DEFAULT_MIDDLEWARE_CONFIG)
+    middleware_config.setdefault("session_secret_key", SESSION_SECRET_KEY)
+    middleware_config.setdefault("dev_mode", DEV_MODE)
+    # An in-process backend is no better than the rate limiter's own counters, which avoid a thread pool hop
+    if not isinstance(app.state.shared_state, MemoryBackend):
+        middleware_config.setdefault("state_backend", app.state.shared_state)
+    init_middlewares(app, middleware_config)
+
+    @app.get("/", include_in_schema=False)
+    async def root():
+        return RedirectResponse(url="/docs")
+
+    # Include the router in the app
+    app.include_router(gemini_router)
+
+    return app
+
+
+def __getattr__(name):
+    # The module-level app is built on first access, so `uvicorn main:create_app --factory` and embedders calling
+    # create_app() do not also pay for an unused default app and its state backend
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Include the router in the app
-app.include_router(gemini_router)
 
 if __name__ == "__main__":
     try:
-        uvicorn.run(app, host="0.0.0.0", port=8000)
+        if WORKERS > 1:
+            # Workers import the application themselves, so it must be passed as an import string
+            uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS)
+        else:
+            uvicorn.run(create_app(), host="0.0.0.0", port=8000)
     except Exception as e:
-        logger.error(f"Error starting the server: {e}")
\ No newline at end of file
+        logger.error(f"Error starting the server: {e}")
@@ -5,6 +5,7 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, PlainTextResponse
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -33,7 +34,12 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         if not self.rate_limiter.is_ip_allowed(client_ip):
             return JSONResponse(status_code=403, content={"error": "IP address is not allowed"})
 
-        if not self.rate_limiter.can_proceed(tokens=1):
+        if self.rate_limiter.backend is not None:
+            # Shared backends do blocking I/O, which must not stall the event loop
+            allowed = await run_in_threadpool(self.rate_limiter.can_proceed, tokens=1)
+        else:
+            allowed = self.rate_limiter.can_proceed(tokens=1)
+        if not allowed:
             return JSONResponse(status_code=429, content={"error": "Too many requests"})
 
         return await call_next(request)
@@ -57,7 +63,11 @@ def init_middlewares(app: FastAPI, middleware_config: dict):
 
     Args:
         app (FastAPI): The FastAPI application instance.
-        middleware_config (dict): Configuration dictionary to enable/disable middlewares.
+        middleware_config (dict): Configuration dictionary to enable/disable middlewares. Optional settings:
+            session_secret_key (str): Secret used to sign session cookies. Must be identical in every worker.
+            dev_mode (bool): Use a random per-process session secret if none is configured, instead of failing.
+            state_backend: Shared-state backend holding the rate limit counters.
+            rate_limits (dict): Overrides of the RateLimiter limits.
     """
     if middleware_config.get("cors", True):
         app.add_middleware(
@@ -74,7 +84,14 @@ def init_middlewares(app: FastAPI, middleware_config: dict):
         logger.info("GZip middleware enabled")
 
     if middleware_config.get("session", True):
-        app.add_middleware(SessionMiddleware, secret_key=secrets.token_urlsafe(32))
+        secret_key = middleware_config.get("session_secret_key")
+        if not secret_key:
+            if not middleware_config.get("dev_mode", False):
+                logger.error("SESSION_SECRET_KEY environment variable must be set, or DEV_MODE enabled")
+                raise ValueError("SESSION_SECRET_KEY environment variable must be set, or DEV_MODE enabled")
+            secret_key = secrets.token_urlsafe(32)
+            logger.warning("No session secret key configured; sessions will not be valid across workers or restarts")
+        app.add_middleware(SessionMiddleware, secret_key=secret_key)
         logger.info("Session middleware enabled")
 
     if middleware_config.get("trusted_host", True):
@@ -86,7 +103,9 @@ def init_middlewares(app: FastAPI, middleware_config: dict):
         logger.info("Error handling middleware enabled")
 
     if middleware_config.get("rate_limit", True):
-        rate_limiter = RateLimiter(max_requests_per_minute=5, max_tokens_per_minute=5, max_requests_per_day=100)
+        rate_limits = {"max_requests_per_minute": 5, "max_tokens_per_minute": 5, "max_requests_per_day": 100,
+                       **middleware_config.get("rate_limits", {})}
+        rate_limiter = RateLimiter(**rate_limits, backend=middleware_config.get("state_backend"))
         app.add_middleware(RateLimitMiddleware, rate_limiter=rate_limiter)
         logger.info("Rate limiting middleware enabled")
 
@@ -1,11 +1,21 @@
-import logging
 import threading
 import time
 
+from loguru import logger
+
+from state_backend import check_and_incr
+
 
 class RateLimiter:
     def __init__(self, max_requests_per_minute, max_tokens_per_minute, max_requests_per_day, whitelist=None,
-                 blacklist=None):
+                 blacklist=None, backend=None, key_prefix="ratelimit"):
+        """
+        Args:
+            backend: Optional shared-state backend (see state_backend.create_backend). When set, counters are kept in
+                the backend and shared by every process using it; otherwise they are local to this instance. Calls to
+                a shared backend block, so callers on an event loop should run can_proceed in a thread pool.
+            key_prefix (str): Prefix of the backend keys holding the counters.
+        """
         self.max_requests_per_minute = max_requests_per_minute
         self.max_tokens_per_minute = max_tokens_per_minute
         self.max_requests_per_day = max_requests_per_day
@@ -22,44 +32,73 @@ class RateLimiter:
         self.whitelist = whitelist if whitelist is not None else set()
         self.blacklist = blacklist if blacklist is not None else set()
 
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.key_prefix = key_prefix
+
+        self.logger = logger
 
     def _reset_limits(self):
+        # Returns the names of the windows that were reset so the caller can log them outside the lock
         current_time = time.time()
+        reset = []
         if current_time >= self.minute_reset_time:
             self.requests_this_minute = 0
             self.tokens_this_minute = 0
             self.minute_reset_time = current_time + 60
-            self.logger.info("Minute limits reset")
+            reset.append("Minute")
         if current_time >= self.day_reset_time:
             self.requests_today = 0
             self.day_reset_time = current_time + 86400
-            self.logger.info("Daily limits reset")
+            reset.append("Daily")
+        return reset
+
+    def _can_proceed_shared(self, tokens):
+        # Fixed windows aligned to the clock, so every process agrees on the current window. All three counters are
+        # checked and incremented in one atomic backend operation.
+        current_time = time.time()
+        minute_window = int(current_time // 60)
+        day_window = int(current_time // 86400)
+        allowed, counters = check_and_incr(self.backend, [
+            (f"{self.key_prefix}:minute:{minute_window}:requests", 1, self.max_requests_per_minute, 60),
+            (f"{self.key_prefix}:minute:{minute_window}:tokens", tokens, self.max_tokens_per_minute, 60),
+            (f"{self.key_prefix}:day:{day_window}:requests", 1, self.max_requests_per_day, 86400),
+        ])
+        return allowed, tuple(counters)
 
     def can_proceed(self, tokens):
-        with self.lock:
-            self._reset_limits()
-            if (self.requests_this_minute < self.max_requests_per_minute and
-                    self.tokens_this_minute + tokens <= self.max_tokens_per_minute and
-                    self.requests_today < self.max_requests_per_day):
-                self.requests_this_minute += 1
-                self.tokens_this_minute += tokens
-                self.requests_today += 1
-                self.logger.info(
-                    f"Request allowed: {self.requests_this_minute} requests this minute, {self.tokens_this_minute} tokens this minute, {self.requests_today} requests today")
-                return True
+        if self.backend is not None:
+            reset = []
+            allowed, counters = self._can_proceed_shared(tokens)
+        else:
+            with self.lock:
+                reset = self._reset_limits()
+                allowed = (self.requests_this_minute < self.max_requests_per_minute and
+                           self.tokens_this_minute + tokens <= self.max_tokens_per_minute and
+                           self.requests_today < self.max_requests_per_day)
+                if allowed:
+                    self.requests_this_minute += 1
+                    self.tokens_this_minute += tokens
+                    self.requests_today += 1
+                counters = (self.requests_this_minute, self.tokens_this_minute, self.requests_today)
+
+        # Log after releasing the lock; loguru only formats the message if DEBUG is enabled
+        for window in reset:
+            self.logger.debug("{} limits reset", window)
+        if allowed:
+            self.logger.debug("Request allowed: {} requests this minute, {} tokens this minute, {} requests today",
+                              *counters)
+        else:
             self.logger.warning("Request denied: Rate limit exceeded")
-            return False
+        return allowed
 
     def is_ip_allowed(self, client_ip):
         if client_ip in self.blacklist:
-            self.logger.warning(f"IP {client_ip} is blacklisted")
+            self.logger.warning("IP {} is blacklisted", client_ip)
             return False
         if client_ip in self.whitelist:
-            self.logger.info(f"IP {client_ip} is whitelisted")
+            self.logger.debug("IP {} is whitelisted", client_ip)
             return True
-        self.logger.info(f"IP {client_ip} is allowed")
+        self.logger.debug("IP {} is allowed", client_ip)
         return True
 
     def update_limits(self, max_requests_per_minute=None, max_tokens_per_minute=None, max_requests_per_day=None):
@@ -0,0 +1,280 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+# (key, amount, limit, ttl in seconds) of one counter checked and incremented by check_and_incr
+CounterIncrement = Tuple[str, int, int, int]
+
+# Minimum number of seconds between sweeps of expired keys. Expired keys are otherwise only removed when read again,
+# which never happens for the keys of past rate limit windows.
+_SWEEP_INTERVAL = 60
+
+# Redis implementation of check_and_incr. KEYS are the counters; ARGV holds amount, limit and ttl for each of them.
+_CHECK_AND_INCR_SCRIPT = """
+local values = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local amount = tonumber(ARGV[i * 3 - 2])
+    values[i] = tonumber(redis.call('GET', key) or '0') + amount
+    if values[i] > tonumber(ARGV[i * 3 - 1]) then
+        allowed = 0
+    end
+end
+if allowed == 1 then
+    for i, key in ipairs(KEYS) do
+        redis.call('INCRBY', key, ARGV[i * 3 - 2])
+        if redis.call('TTL', key) < 0 then
+            redis.call('EXPIRE', key, ARGV[i * 3])
+        end
+    end
+else
+    for i, key in ipairs(KEYS) do
+        values[i] = values[i] - tonumber(ARGV[i * 3 - 2])
+    end
+end
+return {allowed, unpack(values)}
+"""
+
+
+class MemoryBackend:
+    """
+    In-process key-value store implementing the subset of the Redis client interface used by the application.
+
+    State is not shared between worker processes, so this backend is only suitable for a single worker, or as a
+    stand-in for Redis in tests.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + _SWEEP_INTERVAL
+
+    def _sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + _SWEEP_INTERVAL
+        for key in [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]:
+            del self._data[key]
+
+    def _get_live(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._get_live(key)
+            return entry[0] if entry is not None else None
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._sweep(time.time())
+            self._data[key] = (str(value), time.time() + ex if ex is not None else None)
+            return True
+
+    def incrby(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._sweep(time.time())
+            entry = self._get_live(key)
+            value = (int(entry[0]) if entry is not None else 0) + amount
+            self._data[key] = (str(value), entry[1] if entry is not None else None)
+            return value
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            entry = self._get_live(key)
+            if entry is None:
+                return False
+            self._data[key] = (entry[0], time.time() + seconds)
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def check_and_incr(self, increments: Sequence[CounterIncrement]) -> Tuple[bool, List[int]]:
+        with self._lock:
+            now = time.time()
+            self._sweep(now)
+            entries = [self._get_live(key) for key, _, _, _ in increments]
+            values = [int(entry[0]) if entry is not None else 0 for entry in entries]
+            if any(value + amount > limit for value, (_, amount, limit, _) in zip(values, increments)):
+                return False, values
+            for i, (entry, (key, amount, _, ttl)) in enumerate(zip(entries, increments)):
+                values[i] += amount
+                expires_at = entry[1] if entry is not None and entry[1] is not None else now + ttl
+                self._data[key] = (str(values[i]), expires_at)
+            return True, values
+
+
+class SQLiteBackend:
+    """
+    Key-value store backed by a SQLite database, shared by all worker processes on the same host.
+
+    Implements the same interface as MemoryBackend. Each thread uses its own connection, and writes are serialized by
+    SQLite's database lock. Connections are never reused across a fork.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS kv_expires_at ON kv (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, str(value), time.time() + ex if ex is not None else None),
+        )
+        return True
+
+    def incrby(self, key: str, amount: int = 1) -> int:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+            conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value",
+                (key, amount),
+            )
+            value = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return int(value)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE kv SET expires_at = ? WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (time.time() + seconds, key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def check_and_incr(self, increments: Sequence[CounterIncrement]) -> Tuple[bool, List[int]]:
+        conn = self._connection()
+        now = time.time()
+        keys = [key for key, _, _, _ in increments]
+        placeholders = ", ".join("?" * len(keys))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now >= self._next_sweep:
+                # Other processes sweep on their own schedule; a redundant sweep only costs an index lookup
+                self._next_sweep = now + _SWEEP_INTERVAL
+                conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+            else:
+                conn.execute(f"DELETE FROM kv WHERE key IN ({placeholders}) AND expires_at IS NOT NULL "
+                             f"AND expires_at <= ?", (*keys, now))
+            rows = dict(conn.execute(f"SELECT key, value FROM kv WHERE key IN ({placeholders})", keys).fetchall())
+            values = [int(rows.get(key, 0)) for key in keys]
+            allowed = all(value + amount <= limit for value, (_, amount, limit, _) in zip(values, increments))
+            if allowed:
+                for i, (key, amount, _, ttl) in enumerate(increments):
+                    values[i] += amount
+                    conn.execute(
+                        "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                        "expires_at = COALESCE(kv.expires_at, excluded.expires_at)",
+                        (key, str(values[i]), now + ttl),
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, values
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        cursor = self._connection().execute(
+            f"DELETE FROM kv WHERE key IN ({', '.join('?' * len(keys))})", keys
+        )
+        return cursor.rowcount
+
+
+def check_and_incr(backend, increments: Sequence[CounterIncrement]) -> Tuple[bool, List[int]]:
+    """
+    Atomically increment a group of counters, but only if none of them would exceed its limit.
+
+    Counters created by the increment expire after their ttl. MemoryBackend and SQLiteBackend do this in a single
+    locked operation, and periodically purge expired keys while doing so; Redis clients run it as a Lua script.
+
+    Args:
+        backend: The shared-state backend.
+        increments (list): (key, amount, limit, ttl) of each counter.
+
+    Returns:
+        Tuple[bool, List[int]]: Whether the counters were incremented, and their current values.
+    """
+    if hasattr(backend, "check_and_incr"):
+        return backend.check_and_incr(increments)
+
+    args = [value for _, amount, limit, ttl in increments for value in (amount, limit, ttl)]
+    result = backend.eval(_CHECK_AND_INCR_SCRIPT, len(increments), *(key for key, _, _, _ in increments), *args)
+    return bool(result[0]), [int(value) for value in result[1:]]
+
+
+def create_backend(url: str):
+    """
+    Create a shared-state backend from a URL.
+
+    Supported URLs:
+        memory://                    In-process store, for a single worker.
+        sqlite:///state.db           SQLite database shared by all workers on the host. Use four slashes for an
+                                     absolute path, e.g. sqlite:////var/lib/app/state.db.
+        redis://host:port/db         Redis server, shared by all workers on all hosts. Requires the redis package.
+
+    Args:
+        url (str): The backend URL.
+
+    Returns:
+        An object implementing get, set, incrby, expire and delete with Redis semantics. Use check_and_incr() for
+        atomic rate limit counters.
+    """
+    scheme, _, location = url.partition("://")
+    if scheme == "memory":
+        backend = MemoryBackend()
+    elif scheme == "sqlite":
+        path = location[1:] if location.startswith("/") else location
+        if not path:
+            raise ValueError("SQLite state backend URL must include a database path")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        backend = SQLiteBackend(path)
+    elif scheme in ("redis", "rediss", "unix"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The redis package is required for the Redis state backend") from e
+        backend = redis.Redis.from_url(url, decode_responses=True)
+    else:
+        raise ValueError(f"Unsupported state backend URL: {url}")
+
+    logger.info(f"State backend initialized: {scheme}")
+    return backend
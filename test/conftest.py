@@ -0,0 +1,18 @@
+import os
+
+# Modules that build the default app on import, e.g. test_gemini_api, need settings that are safe without a deployment
+os.environ.setdefault("DEV_MODE", "true")
+os.environ.setdefault("STATE_BACKEND_URL", "memory://")
+
+import pytest  # noqa: E402
+
+import genai_client  # noqa: E402
+import main  # noqa: E402
+
+
+@pytest.fixture
+def app_settings(monkeypatch, tmp_path):
+    """Settings create_app() needs at startup, so tests do not depend on the environment."""
+    monkeypatch.setattr(genai_client, "GOOGLE_API_KEY", "stub")
+    monkeypatch.setattr(main, "SESSION_SECRET_KEY", "test")
+    monkeypatch.setattr(main, "STATE_BACKEND_URL", f"sqlite:///{tmp_path}/state.db")
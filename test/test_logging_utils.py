@@ -0,0 +1,123 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+from loguru import logger
+
+from logging_utils import BackgroundSink, configure_logging, log_payload, parse_sample_rates, truncate
+
+
+def _capture(level="DEBUG", **kwargs):
+    configure_logging(level=level, enqueue=False, **kwargs)
+    stream = io.StringIO()
+    logger.remove()
+    logger.add(stream, level=level, format="{extra[route]} - {message}")
+    return stream
+
+
+def test_truncate():
+    assert truncate("short", limit=10) == "short"
+    assert truncate("x" * 20, limit=10) == "x" * 10 + "... [truncated 10 chars]"
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("process_search=0.1, process_code=2,bad=x") == {
+        "process_search": 0.1,
+        "process_code": 1.0,
+    }
+
+
+def test_log_payload_is_truncated():
+    stream = _capture(max_payload_chars=8)
+    log_payload("process_code", "Code received", "print('Hello, World!')")
+    assert stream.getvalue() == "process_code - Code received: print('H... [truncated 14 chars]\n"
+
+
+def test_log_payload_skips_disabled_level():
+    stream = _capture(level="INFO")
+    calls = []
+    log_payload("process_search", "Search response", lambda: calls.append(1))
+    assert calls == []
+    assert stream.getvalue() == ""
+
+
+def test_log_payload_sampling():
+    stream = _capture(sample_rates={"process_search": 0.0})
+    log_payload("process_search", "Search response", "dropped")
+    log_payload("process_code", "Code received", "kept")
+    assert stream.getvalue() == "process_code - Code received: kept\n"
+
+
+def test_background_sink_flushes_on_remove():
+    stream = io.StringIO()
+    logger.remove()
+    logger.add(BackgroundSink(stream), format="{message}")
+    for i in range(100):
+        logger.info("message {}", i)
+    logger.remove()
+    assert stream.getvalue().splitlines() == [f"message {i}" for i in range(100)]
+
+
+def test_background_sink_flushes_file_on_remove(tmp_path):
+    path = tmp_path / "app.log"
+    with open(path, "w") as stream:
+        logger.remove()
+        logger.add(BackgroundSink(stream), format="{message}")
+        for i in range(50):
+            logger.info("message {}", i)
+        logger.remove()
+        assert path.read_text().splitlines() == [f"message {i}" for i in range(50)]
+
+
+def test_background_sink_keeps_warnings_and_reports_drops():
+    class SlowStream(io.StringIO):
+        def __init__(self):
+            super().__init__()
+            self.writing = threading.Event()
+            self.release = threading.Event()
+
+        def write(self, text):
+            self.writing.set()
+            self.release.wait()
+            return super().write(text)
+
+    stream = SlowStream()
+    sink = BackgroundSink(stream, max_queue_size=2, report_interval=0)
+    logger.remove()
+    logger.add(sink, format="{level} {message}")
+    logger.info("first")
+    stream.writing.wait()
+    for i in range(5):
+        logger.info("info {}", i)
+    assert sink.dropped == 3
+
+    warning = threading.Thread(target=logger.warning, args=("kept",))
+    warning.start()
+    stream.release.set()
+    warning.join()
+    deadline = time.monotonic() + 5
+    while "dropped" not in stream.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    logger.remove()
+
+    lines = stream.getvalue().splitlines()
+    assert lines[:4] == ["INFO first", "INFO info 0", "INFO info 1", "WARNING kept"]
+    assert "WARNING 3 log records dropped because the log writer fell behind" in lines
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_background_sink_restarts_writer_after_fork(tmp_path):
+    path = tmp_path / "app.log"
+    with open(path, "w") as stream:
+        logger.remove()
+        logger.add(BackgroundSink(stream), format="{message}")
+        pid = os.fork()
+        if pid == 0:
+            logger.info("from child")
+            logger.remove()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        logger.remove()
+    assert path.read_text().splitlines() == ["from child"]
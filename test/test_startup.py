@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import genai_client
+from main import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_does_not_load_heavy_dependencies():
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_API_KEY"}
+    env["LOG_LEVEL"] = "ERROR"
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('google.generativeai', 'PIL', 'PyPDF2') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_create_app_serves_requests(app_settings):
+    with TestClient(create_app(warmup=False)) as client:
+        response = client.get("/openapi.json")
+    assert response.status_code == 200
+    assert "/v1/process_code" in response.json()["paths"]
+
+
+def test_startup_fails_without_api_key(app_settings, monkeypatch):
+    monkeypatch.setattr(genai_client, "GOOGLE_API_KEY", None)
+    with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+        with TestClient(create_app(warmup=False)):
+            pass
+
+
+def test_create_app_requires_session_secret(app_settings):
+    with pytest.raises(ValueError, match="SESSION_SECRET_KEY"):
+        create_app({"session": True, "session_secret_key": None, "dev_mode": False}, warmup=False)
+    create_app({"session": True, "session_secret_key": None, "dev_mode": True}, warmup=False)
+
+
+def test_import_does_not_build_default_app():
+    code = "import main; print('app' in vars(main)); main.app; print('app' in vars(main))"
+    env = dict(os.environ, LOG_LEVEL="ERROR", SESSION_SECRET_KEY="test", STATE_BACKEND_URL="memory://")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["False", "True"]
@@ -0,0 +1,138 @@
+import multiprocessing
+import time
+
+import pytest
+
+from rate_limiter import RateLimiter
+import state_backend
+from state_backend import MemoryBackend, SQLiteBackend, check_and_incr, create_backend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / "state.db"))
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def counter_backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "state.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def _increment(path, count):
+    backend = SQLiteBackend(path)
+    for _ in range(count):
+        backend.incrby("counter", 1)
+
+
+def test_get_set_delete(backend):
+    assert backend.get("key") is None
+    backend.set("key", "value")
+    assert backend.get("key") == "value"
+    assert backend.delete("key", "missing") == 1
+    assert backend.get("key") is None
+
+
+def test_incrby_and_expire(clock, backend):
+    assert backend.incrby("counter", 2) == 2
+    assert backend.incrby("counter", -1) == 1
+    assert backend.get("counter") == "1"
+    assert backend.expire("counter", 1)
+    clock[0] += 1.1
+    assert backend.get("counter") is None
+    assert backend.incrby("counter", 1) == 1
+
+
+def test_set_with_expiry(clock, backend):
+    backend.set("key", 1, ex=1)
+    assert backend.get("key") == "1"
+    clock[0] += 1.1
+    assert backend.get("key") is None
+
+
+def test_sqlite_increments_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "state.db")
+    SQLiteBackend(path)
+    processes = [multiprocessing.Process(target=_increment, args=(path, 50)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert SQLiteBackend(path).get("counter") == "200"
+
+
+def test_check_and_incr(counter_backend):
+    increments = [("requests", 1, 2, 60), ("tokens", 3, 5, 60)]
+    assert check_and_incr(counter_backend, increments) == (True, [1, 3])
+    assert check_and_incr(counter_backend, increments) == (False, [1, 3])
+    assert check_and_incr(counter_backend, [("requests", 1, 2, 60), ("tokens", 2, 5, 60)]) == (True, [2, 5])
+    assert counter_backend.get("requests") == "2"
+
+
+def test_check_and_incr_sets_expiry(clock, counter_backend):
+    assert check_and_incr(counter_backend, [("requests", 1, 10, 1)]) == (True, [1])
+    clock[0] += 1.1
+    assert counter_backend.get("requests") is None
+    assert check_and_incr(counter_backend, [("requests", 1, 10, 1)]) == (True, [1])
+
+
+def test_expired_counters_are_purged(clock, backend):
+    for window in range(3):
+        check_and_incr(backend, [(f"window:{window}", 1, 10, 60)])
+        clock[0] += 60
+    clock[0] += state_backend._SWEEP_INTERVAL
+    check_and_incr(backend, [("current", 1, 10, 60)])
+    if isinstance(backend, MemoryBackend):
+        assert list(backend._data) == ["current"]
+    else:
+        assert backend._connection().execute("SELECT key FROM kv").fetchall() == [("current",)]
+
+
+def test_rate_limiter_shares_limits_through_backend(clock, counter_backend):
+    # The fake clock keeps every call in the same clock-aligned minute
+    limiters = [RateLimiter(max_requests_per_minute=3, max_tokens_per_minute=10, max_requests_per_day=100,
+                            backend=counter_backend) for _ in range(2)]
+    results = [limiters[i % 2].can_proceed(tokens=1) for i in range(5)]
+    assert results == [True, True, True, False, False]
+
+
+def test_create_backend(tmp_path):
+    assert isinstance(create_backend("memory://"), MemoryBackend)
+    assert isinstance(create_backend(f"sqlite:///{tmp_path}/state.db"), SQLiteBackend)
+    with pytest.raises(ValueError):
+        create_backend("unknown://")
+
+
+def test_rate_limit_middleware_uses_shared_backend(tmp_path, app_settings):
+    from fastapi.testclient import TestClient
+
+    from main import DEFAULT_MIDDLEWARE_CONFIG, create_app
+
+    backend = SQLiteBackend(str(tmp_path / "state.db"))
+    config = {**DEFAULT_MIDDLEWARE_CONFIG, "rate_limit": True, "rate_limits": {"max_requests_per_minute": 2}}
+    with TestClient(create_app(config, warmup=False, state_backend=backend)) as client:
+        statuses = [client.get("/openapi.json").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_memory_backend_is_not_passed_to_rate_limiter(app_settings):
+    from main import DEFAULT_MIDDLEWARE_CONFIG, create_app
+    from middlewares import RateLimitMiddleware
+
+    config = {**DEFAULT_MIDDLEWARE_CONFIG, "rate_limit": True}
+    app = create_app(config, warmup=False, state_backend=MemoryBackend())
+    middleware = next(m for m in app.user_middleware if m.cls is RateLimitMiddleware)
+    assert middleware.kwargs["rate_limiter"].backend is None
@@ -0,0 +1,282 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+import grpc
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from google.generativeai import client as sdk_client
+
+import genai_client
+from main import create_app
+from transport import UPLOAD_CHUNK_GRANULARITY, GenaiTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status=200, body=b"{}", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        command = self.headers.get("X-Goog-Upload-Command", "")
+        if command == "start":
+            server.received = b""
+            server.finalized = False
+            self._reply(headers={"X-Goog-Upload-URL": f"http://{self.headers['Host']}/upload/v1beta/files?id=1"})
+        elif command == "query":
+            if server.fail_next_query:
+                server.fail_next_query = False
+                self._reply(status=503)
+            elif server.finalized:
+                self._reply(body=server.file, headers={"X-Goog-Upload-Status": "final"})
+            else:
+                self._reply(headers={"X-Goog-Upload-Status": "active",
+                                     "X-Goog-Upload-Size-Received": str(len(server.received))})
+        elif command.startswith("upload"):
+            if server.fail_next_chunk:
+                status, server.fail_next_chunk = server.fail_next_chunk, None
+                server.failures += 1
+                self._reply(status=status, headers=server.failure_headers)
+                return
+            assert not server.finalized
+            assert int(self.headers["X-Goog-Upload-Offset"]) == len(server.received)
+            server.received += body
+            server.chunks += 1
+            if "finalize" in command:
+                server.finalized = True
+                if server.lose_final_reply:
+                    self._reply(status=503)
+                else:
+                    self._reply(body=server.file)
+            else:
+                self._reply()
+        else:
+            response = {"candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "index": 0}]}
+            self._reply(body=json.dumps(response).encode())
+
+
+@pytest.fixture
+def client_manager():
+    # genai.configure() and GenaiTransport.install() change process-wide SDK state; restore it after each test
+    manager = sdk_client._client_manager
+    saved = (dict(manager.clients), manager.client_config, manager.default_metadata)
+    yield manager
+    manager.clients, manager.client_config, manager.default_metadata = saved
+
+
+@pytest.fixture
+def grpc_stub_server():
+    def generate_content(request, context):
+        return glm.GenerateContentResponse(candidates=[
+            glm.Candidate(index=0, content=glm.Content(role="model", parts=[glm.Part(text="ok")]))
+        ])
+
+    handler = grpc.method_handlers_generic_handler("google.ai.generativelanguage.v1beta.GenerativeService", {
+        "GenerateContent": grpc.unary_unary_rpc_method_handler(
+            generate_content,
+            request_deserializer=glm.GenerateContentRequest.deserialize,
+            response_serializer=glm.GenerateContentResponse.serialize,
+        ),
+    })
+    server = grpc.server(ThreadPoolExecutor(max_workers=4), handlers=[handler])
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop(None)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Records upload backoff delays instead of waiting
+    delays = []
+    monkeypatch.setattr("transport.time.sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.received = b""
+    server.chunks = 0
+    server.fail_next_chunk = None
+    server.failure_headers = None
+    server.fail_next_query = False
+    server.lose_final_reply = False
+    server.finalized = False
+    server.failures = 0
+    server.file = json.dumps({"file": {"name": "files/stub", "mimeType": "application/octet-stream",
+                                       "state": "ACTIVE", "uri": "http://stub/files/stub"}}).encode()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_upload_is_chunked(tmp_path, stub_server):
+    server, endpoint = stub_server
+    data = bytes(range(256)) * (UPLOAD_CHUNK_GRANULARITY * 3 // 256 + 10)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+
+    transport = GenaiTransport("stub", kind="rest", endpoint=endpoint, upload_chunk_size=UPLOAD_CHUNK_GRANULARITY)
+    assert transport.upload_file(str(path), display_name="data").name == "files/stub"
+    assert server.received == data
+    assert server.chunks == 4
+    assert transport.stats()["http"]["connections_opened"] == 1
+
+
+def test_upload_resumes_after_failed_chunk(tmp_path, stub_server, sleeps):
+    server, endpoint = stub_server
+    data = b"x" * (UPLOAD_CHUNK_GRANULARITY * 2)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    server.fail_next_chunk = 503
+    server.fail_next_query = True
+
+    transport = GenaiTransport("stub", kind="rest", endpoint=endpoint, upload_chunk_size=UPLOAD_CHUNK_GRANULARITY)
+    assert transport.upload_file(str(path)).name == "files/stub"
+    assert server.received == data
+    # The failed chunk and the failed offset query back off exponentially
+    assert sleeps == [1.0, 2.0]
+
+
+def test_upload_honours_retry_after(tmp_path, stub_server, sleeps):
+    server, endpoint = stub_server
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * UPLOAD_CHUNK_GRANULARITY)
+    server.fail_next_chunk = 429
+    server.failure_headers = {"Retry-After": "7"}
+
+    transport = GenaiTransport("stub", kind="rest", endpoint=endpoint)
+    assert transport.upload_file(str(path)).name == "files/stub"
+    assert sleeps == [7.0]
+
+
+def test_upload_returns_file_when_final_reply_is_lost(tmp_path, stub_server, sleeps):
+    server, endpoint = stub_server
+    data = b"x" * (UPLOAD_CHUNK_GRANULARITY * 2)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    server.lose_final_reply = True
+
+    transport = GenaiTransport("stub", kind="rest", endpoint=endpoint, upload_chunk_size=UPLOAD_CHUNK_GRANULARITY)
+    assert transport.upload_file(str(path)).name == "files/stub"
+    assert server.received == data
+    assert server.chunks == 2
+
+
+def test_upload_does_not_retry_client_errors(tmp_path, stub_server, sleeps):
+    server, endpoint = stub_server
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * UPLOAD_CHUNK_GRANULARITY)
+    server.fail_next_chunk = 403
+
+    transport = GenaiTransport("stub", kind="rest", endpoint=endpoint)
+    with pytest.raises(requests.HTTPError):
+        transport.upload_file(str(path))
+    assert server.failures == 1
+
+
+def test_chunk_size_is_rounded_to_granularity():
+    transport = GenaiTransport("stub", kind="rest", upload_chunk_size=UPLOAD_CHUNK_GRANULARITY + 1)
+    assert transport.upload_chunk_size == UPLOAD_CHUNK_GRANULARITY
+    transport.close()
+
+
+def test_sdk_clients_share_the_pool(stub_server, client_manager):
+    _, endpoint = stub_server
+    genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": endpoint})
+    transport = GenaiTransport("stub", kind="rest", endpoint=endpoint)
+    transport.install()
+
+    model = genai.GenerativeModel("gemini-1.5-flash")
+    for _ in range(3):
+        assert model.generate_content("hello").text == "ok"
+
+    stats = transport.stats()["http"]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+
+
+def test_sdk_upload_works_after_install(tmp_path, stub_server, client_manager, monkeypatch):
+    _, endpoint = stub_server
+    genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": endpoint})
+    GenaiTransport("stub", kind="rest", endpoint=endpoint).install()
+    path = tmp_path / "data.txt"
+    path.write_text("data")
+
+    # The SDK fetches its upload API from a public discovery document; stop there, after the API key check
+    api_keys = []
+
+    def setup_discovery_api(self, metadata=()):
+        api_keys.append(self._client_options.api_key)
+        raise ConnectionAbortedError
+
+    monkeypatch.setattr(sdk_client.FileServiceClient, "_setup_discovery_api", setup_discovery_api)
+    with pytest.raises(ConnectionAbortedError):
+        genai.upload_file(str(path))
+    assert api_keys == ["stub"]
+
+
+def test_grpc_clients_share_the_channel(grpc_stub_server, client_manager):
+    genai.configure(api_key="stub", transport="grpc", client_options={"api_endpoint": grpc_stub_server})
+    transport = GenaiTransport("stub", kind="grpc", endpoint=grpc_stub_server)
+    client = transport.create_client(glm.GenerativeServiceClient)
+    assert client.transport.grpc_channel is transport.channel
+    transport.install()
+
+    model = genai.GenerativeModel("gemini-1.5-flash")
+    for _ in range(3):
+        assert model.generate_content("hello").text == "ok"
+
+    stats = transport.stats()
+    assert stats["transport"] == "grpc"
+    assert stats["grpc"]["calls"] == 3
+    transport.close()
+
+
+def test_transport_is_rebuilt_after_lifespan(stub_server, client_manager, app_settings, monkeypatch):
+    _, endpoint = stub_server
+    monkeypatch.setattr(genai_client, "GENAI_TRANSPORT", "rest")
+    monkeypatch.setattr(genai_client, "GENAI_API_ENDPOINT", endpoint)
+
+    transports = []
+    for _ in range(2):
+        with TestClient(create_app(warmup=False)):
+            assert genai_client.get_model("gemini-1.5-flash").generate_content("hello").text == "ok"
+            transports.append(genai_client._transport)
+        assert genai_client._transport is None
+    assert transports[0] is not transports[1]
+
+
+def test_upload_file_returns_file_from_final_response(tmp_path, stub_server, client_manager, app_settings, monkeypatch):
+    _, endpoint = stub_server
+    monkeypatch.setattr(genai_client, "GENAI_TRANSPORT", "rest")
+    monkeypatch.setattr(genai_client, "GENAI_API_ENDPOINT", endpoint)
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * UPLOAD_CHUNK_GRANULARITY)
+
+    # The stub server has no files.get route, so a second round trip would fail
+    try:
+        file = genai_client.upload_file(str(path))
+    finally:
+        genai_client.close_transport()
+    assert isinstance(file, genai.types.File)
+    assert (file.name, file.state.name) == ("files/stub", "ACTIVE")
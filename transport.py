@@ -0,0 +1,341 @@
+import copy
+import json
+import mimetypes
+import os
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import google.ai.generativelanguage as glm
+import grpc
+import requests
+from google.api_core import client_options as client_options_lib
+from google.api_core import grpc_helpers
+from google.auth import api_key
+from google.auth.transport.requests import AuthorizedSession
+from google.generativeai import client as sdk_client
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from config import logger
+
+# Resumable upload chunks must be a multiple of this size, except for the last one
+UPLOAD_CHUNK_GRANULARITY = 256 * 1024
+
+# Client error statuses worth retrying an upload chunk on; 5xx statuses are always retried
+_RETRYABLE_STATUS_CODES = {408, 429}
+
+
+def _is_retryable(error: requests.RequestException) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and (response.status_code in _RETRYABLE_STATUS_CODES or response.status_code >= 500)
+
+
+def _retry_after(error: requests.RequestException) -> Optional[float]:
+    # Retry-After holds either a number of seconds or an HTTP date
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that enables TCP keepalive on pooled connections, so idle connections survive NAT and load balancer
+    timeouts instead of being silently dropped and re-established.
+    """
+
+    def __init__(self, keepalive_seconds: int, **kwargs):
+        self.keepalive_seconds = keepalive_seconds
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        socket_options = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_options += [
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.keepalive_seconds),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, self.keepalive_seconds),
+            ]
+        kwargs["socket_options"] = socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def pool_stats(self) -> Dict[str, int]:
+        pools = self.poolmanager.pools
+        stats = {"pools": 0, "connections_opened": 0, "requests": 0, "idle_connections": 0}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats["pools"] += 1
+            stats["connections_opened"] += pool.num_connections
+            stats["requests"] += pool.num_requests
+            stats["idle_connections"] += pool.pool.qsize() if pool.pool is not None else 0
+        return stats
+
+
+class _CallCountingInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """gRPC interceptor counting calls made over the shared channel."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        self._count()
+        return continuation(client_call_details, request)
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        self._count()
+        return continuation(client_call_details, request)
+
+
+class GenaiTransport:
+    """
+    Connection pool shared by every Gemini API client in the process.
+
+    With the gRPC transport all services share one HTTP/2 channel with keepalive pings. With the REST transport they
+    share one HTTP connection pool, with TCP keepalive, sized for the expected concurrency. File uploads always go
+    through the pooled HTTP session using the resumable upload protocol, backing off exponentially between retries.
+    """
+
+    def __init__(self, api_key_value: str, kind: str = "grpc", endpoint: str = "generativelanguage.googleapis.com",
+                 pool_size: int = 32, keepalive_seconds: int = 30, upload_chunk_size: int = 8 * 1024 * 1024,
+                 upload_max_retries: int = 3, upload_backoff_seconds: float = 1.0,
+                 upload_max_backoff_seconds: float = 32, timeout: float = 600):
+        if kind not in ("grpc", "rest"):
+            raise ValueError(f"Unsupported transport: {kind}")
+
+        scheme, _, host = endpoint.rpartition("://")
+        self.kind = kind
+        self.scheme = scheme or "https"
+        self.host = host
+        self.base_url = f"{self.scheme}://{self.host}"
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self.upload_chunk_size = max(UPLOAD_CHUNK_GRANULARITY,
+                                     upload_chunk_size // UPLOAD_CHUNK_GRANULARITY * UPLOAD_CHUNK_GRANULARITY)
+        self.upload_max_retries = upload_max_retries
+        self.upload_backoff_seconds = upload_backoff_seconds
+        self.upload_max_backoff_seconds = upload_max_backoff_seconds
+        self.timeout = timeout
+        self.credentials = api_key.Credentials(api_key_value)
+
+        self.adapter = KeepAliveAdapter(keepalive_seconds, pool_connections=4, pool_maxsize=pool_size)
+        self.session = AuthorizedSession(self.credentials)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self.channel = None
+        self._raw_channel = None
+        self._call_counter = _CallCountingInterceptor()
+        self._channel_state = None
+        self._channel_connects = 0
+        if kind == "grpc":
+            self._create_channel()
+
+    def _create_channel(self) -> None:
+        target = self.host if ":" in self.host else f"{self.host}:443"
+        options = [
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+            ("grpc.keepalive_time_ms", self.keepalive_seconds * 1000),
+            ("grpc.keepalive_timeout_ms", 20000),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+        ]
+        if self.scheme == "http":
+            # Plain-text channel for local stub servers
+            self._raw_channel = grpc.insecure_channel(target, options=options)
+        else:
+            self._raw_channel = grpc_helpers.create_channel(target, credentials=self.credentials, options=options)
+        self._raw_channel.subscribe(self._on_channel_state)
+
+        self.channel = grpc.intercept_channel(self._raw_channel, self._call_counter)
+
+    def _on_channel_state(self, state) -> None:
+        self._channel_state = state.name
+        if state.name == "READY":
+            self._channel_connects += 1
+
+    def create_client(self, client_cls, client_info=None, client_options=None):
+        """
+        Create a Generative Language API client that uses the shared connection pool.
+
+        Args:
+            client_cls: The client class, e.g. google.ai.generativelanguage.GenerativeServiceClient.
+            client_info: Optional client info, used for the user agent.
+            client_options: Optional client options, e.g. the ones passed to genai.configure().
+        """
+        transport_cls = client_cls.get_transport_class(self.kind)
+        options = {"client_info": client_info} if client_info is not None else {}
+        if self.kind == "grpc":
+            transport = transport_cls(host=self.host, channel=self.channel, **options)
+        else:
+            transport = transport_cls(host=self.host, credentials=self.credentials, url_scheme=self.scheme, **options)
+            # The REST transports create a private session each. Mounting the shared adapter on it makes every client
+            # draw connections from the same pool.
+            transport._session.mount("https://", self.adapter)
+            transport._session.mount("http://", self.adapter)
+
+        # Clients refuse an API key alongside a transport instance, whose credentials already carry it. The key is
+        # restored on the client afterwards, as the SDK's FileServiceClient reads it from there for uploads.
+        if isinstance(client_options, dict):
+            client_options = client_options_lib.from_dict(client_options)
+        client_options = copy.copy(client_options) if client_options is not None else client_options_lib.ClientOptions()
+        api_key_value, client_options.api_key = client_options.api_key, None
+        client = client_cls(transport=transport, client_options=client_options, **options)
+        client._client_options.api_key = api_key_value
+        return client
+
+    def install(self) -> None:
+        """
+        Make the default clients of the Google Generative AI SDK use the shared connection pool.
+
+        Must be called after genai.configure(), which discards existing default clients.
+        """
+        # genai.configure() only accepts a transport name, so the clients are built here and registered with the
+        # SDK's client manager, which otherwise creates one unpooled client per service on first use.
+        manager = sdk_client._client_manager
+        client_info = manager.client_config.get("client_info")
+        client_options = manager.client_config.get("client_options")
+        client_classes = {
+            "generative": glm.GenerativeServiceClient,
+            "model": glm.ModelServiceClient,
+            "file": sdk_client.FileServiceClient,
+        }
+        for name, client_cls in client_classes.items():
+            manager.clients[name] = self.create_client(client_cls, client_info, client_options)
+        logger.info(f"Gemini API clients using shared {self.kind} transport to {self.base_url}")
+
+    def _query_upload(self, upload_url: str) -> requests.Response:
+        response = self.session.post(upload_url, headers={"X-Goog-Upload-Command": "query"}, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _retry_delay(self, error: requests.RequestException, failures: int) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after
+        return min(self.upload_backoff_seconds * 2 ** (failures - 1), self.upload_max_backoff_seconds)
+
+    def upload_file(self, path: str, mime_type: Optional[str] = None, display_name: Optional[str] = None) -> glm.File:
+        """
+        Upload a file to the File API in chunks, resuming from the last acknowledged offset when a chunk fails.
+
+        Connection errors, timeouts, 408, 429 and 5xx responses are retried up to upload_max_retries times in a row,
+        after waiting for the Retry-After header or an exponential backoff. Other errors are raised immediately.
+
+        Args:
+            path (str): Path of the file to upload.
+            mime_type (str): MIME type of the file. Guessed from the file name if not provided.
+            display_name (str): Optional display name of the file.
+
+        Returns:
+            glm.File: The uploaded file, as returned when the upload is finalized.
+        """
+        size = os.path.getsize(path)
+        mime_type = mime_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        metadata = {"file": {"display_name": display_name}} if display_name else {"file": {}}
+
+        response = self.session.post(
+            f"{self.base_url}/upload/v1beta/files",
+            headers={
+                "X-Goog-Upload-Protocol": "resumable",
+                "X-Goog-Upload-Command": "start",
+                "X-Goog-Upload-Header-Content-Length": str(size),
+                "X-Goog-Upload-Header-Content-Type": mime_type,
+            },
+            json=metadata,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        upload_url = response.headers["X-Goog-Upload-URL"]
+
+        offset = 0
+        failures = 0
+        resume = False
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    if resume:
+                        # Ask the server how much it received. If the last chunk landed but its reply was lost, the
+                        # upload is already final and the query returns the file.
+                        response = self._query_upload(upload_url)
+                        resume = False
+                        if response.headers.get("X-Goog-Upload-Status") == "final":
+                            break
+                        offset = int(response.headers["X-Goog-Upload-Size-Received"])
+
+                    f.seek(offset)
+                    chunk = f.read(self.upload_chunk_size)
+                    last = offset + len(chunk) >= size
+                    response = self.session.post(
+                        upload_url,
+                        data=chunk,
+                        headers={
+                            "X-Goog-Upload-Command": "upload, finalize" if last else "upload",
+                            "X-Goog-Upload-Offset": str(offset),
+                        },
+                        timeout=self.timeout,
+                    )
+                    response.raise_for_status()
+                except requests.RequestException as e:
+                    failures += 1
+                    if not _is_retryable(e) or failures > self.upload_max_retries:
+                        raise
+                    delay = self._retry_delay(e, failures)
+                    logger.warning(f"Upload at offset {offset} failed, resuming in {delay:.1f} s: {e}")
+                    time.sleep(delay)
+                    resume = True
+                    continue
+
+                failures = 0
+                offset += len(chunk)
+                if last:
+                    break
+
+        # The final response holds the complete File resource, so no separate files.get call is needed
+        file = glm.File.from_json(json.dumps(response.json()["file"]), ignore_unknown_fields=True)
+        logger.debug("Uploaded {} ({} bytes) as {}", path, size, file.name)
+        return file
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return connection pool statistics.
+        """
+        stats = {
+            "transport": self.kind,
+            "endpoint": self.base_url,
+            "pool_size": self.pool_size,
+            "keepalive_seconds": self.keepalive_seconds,
+            "upload_chunk_size": self.upload_chunk_size,
+            "http": self.adapter.pool_stats(),
+        }
+        if self.kind == "grpc":
+            stats["grpc"] = {
+                "state": self._channel_state,
+                "connects": self._channel_connects,
+                "calls": self._call_counter.calls,
+            }
+        return stats
+
+    def close(self) -> None:
+        self.session.close()
+        if self._raw_channel is not None:
+            self._raw_channel.close()
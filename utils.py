@@ -2,7 +2,6 @@ import io
 import os
 from typing import Any, Dict
 
-import PyPDF2
 from fastapi import HTTPException
 from pydantic import BaseModel, Field
 
@@ -43,6 +42,8 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
         logger.error("No PDF data provided")
         raise HTTPException(status_code=400, detail="No PDF data provided")
 
+    import PyPDF2
+
     try:
         pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
         if not pdf_reader.pages: